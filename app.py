@@ -1,11 +1,12 @@
 import os
-from flask import Flask
+from flask import Flask, request
 import logging
 
 # Import konfigurasi dari config.py
 from config import UPLOAD_FOLDER, DATABASE_URI, SQLALCHEMY_TRACK_MODIFICATIONS, SECRET_KEY
 from extensions import db, login_manager # Import db dan login_manager dari extensions.py
 from models import User # Import User model
+from caching import static_file_hash
 
 # Inisialisasi Flask App
 app = Flask(__name__)
@@ -29,6 +30,30 @@ login_manager.login_message_category = "info"
 def load_user(user_id):
     return User.query.get(int(user_id))
 
+# Fingerprint URL aset statis (CSS/JS) agar bisa di-cache lama oleh browser
+STATIC_MAX_AGE = 365 * 24 * 60 * 60
+
+@app.url_defaults
+def fingerprint_static_url(endpoint, values):
+    if endpoint == 'static' and 'filename' in values and not values['filename'].startswith('uploads/'):
+        file_hash = static_file_hash(app.static_folder, values['filename'])
+        if file_hash:
+            values['v'] = file_hash
+
+@app.after_request
+def cache_fingerprinted_static(response):
+    if request.endpoint != 'static' or response.status_code not in (200, 304):
+        return response
+    version = request.args.get('v')
+    # Hanya URL dengan hash yang cocok dengan isi file saat ini yang boleh di-cache permanen
+    if version and version == static_file_hash(app.static_folder, request.view_args['filename']):
+        # send_file sudah memasang no-cache; hapus agar browser tidak memvalidasi ulang
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = STATIC_MAX_AGE
+        response.cache_control.immutable = True
+    return response
+
 # Pastikan folder uploads ada
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
@@ -39,6 +64,10 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 from routes import main_bp
 app.register_blueprint(main_bp)
 
+# Perintah pemeliharaan: flask --app app cleanup-uploads
+from maintenance import cleanup_uploads
+app.cli.add_command(cleanup_uploads)
+
 # Import model database agar terdaftar oleh SQLAlchemy
 from models import Riwayat
 
@@ -0,0 +1,43 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+from flask import request, make_response
+
+# ==============================================================================
+# CACHE HALAMAN STATIS (hanya berubah saat deploy)
+# ==============================================================================
+
+# Waktu proses dimulai dipakai sebagai Last-Modified, karena konten hanya berubah saat deploy
+DEPLOY_TIME = datetime.now(timezone.utc).replace(microsecond=0)
+
+_rendered_pages = {}
+_static_hashes = {}
+
+def cached_page(key, render):
+    """
+    Mengembalikan HTML hasil render yang disimpan di memori, dengan ETag dan
+    Last-Modified. Jika browser sudah memiliki versi yang sama, dibalas 304 tanpa isi.
+    `render` hanya dipanggil sekali per `key` selama proses berjalan.
+    """
+    if key not in _rendered_pages:
+        html = render()
+        _rendered_pages[key] = (html, hashlib.sha1(html.encode('utf-8')).hexdigest())
+    html, etag = _rendered_pages[key]
+
+    response = make_response(html)
+    response.set_etag(etag)
+    response.last_modified = DEPLOY_TIME
+    # Browser tetap memvalidasi ulang, tapi cukup menerima 304 jika tidak ada perubahan
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response.make_conditional(request)
+
+def static_file_hash(static_folder, filename):
+    """Hash singkat isi file statis untuk URL dengan fingerprint (?v=...)."""
+    if filename not in _static_hashes:
+        path = os.path.join(static_folder, filename)
+        if not os.path.isfile(path):
+            return None
+        with open(path, 'rb') as f:
+            _static_hashes[filename] = hashlib.sha1(f.read()).hexdigest()[:12]
+    return _static_hashes[filename]
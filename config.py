@@ -20,3 +20,15 @@ MONTH_MAP = {
     'May': 'Mei', 'June': 'Juni', 'July': 'Juli', 'August': 'Agustus',
     'September': 'September', 'October': 'Oktober', 'November': 'November', 'December': 'Desember'
 }
+
+# Thumbnail WebP untuk halaman riwayat (dibuat saat pertama kali diminta)
+THUMBNAIL_FOLDER = os.path.join(BASE_DIR, 'static/thumbnails')
+THUMBNAIL_WIDTHS = [160, 320, 640]
+THUMBNAIL_QUALITY = 75
+THUMBNAIL_MAX_AGE = 365 * 24 * 60 * 60 # 1 tahun, nama file upload selalu unik
+
+# Pemeliharaan folder uploads (perintah `flask --app app cleanup-uploads`)
+ORPHAN_MIN_AGE_HOURS = 24 # File tanpa Riwayat baru dihapus setelah umur ini (misalnya hasil "uncertain")
+COMPACT_AFTER_DAYS = 30 # Gambar asli yang lebih tua dari ini dikompres ulang
+COMPACT_MAX_SIZE = 1600 # Sisi terpanjang maksimum (piksel) setelah dikompres
+COMPACT_JPEG_QUALITY = 80
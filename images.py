@@ -0,0 +1,108 @@
+import os
+import tempfile
+from PIL import Image, ImageOps
+from config import UPLOAD_FOLDER, THUMBNAIL_FOLDER, THUMBNAIL_WIDTHS, THUMBNAIL_QUALITY
+
+# ==============================================================================
+# FUNGSI HELPER (THUMBNAIL GAMBAR)
+# ==============================================================================
+
+def thumbnail_name(filename):
+    """Nama file thumbnail WebP untuk sebuah file upload (ekstensi asli tetap dipakai agar unik)."""
+    return filename + '.webp'
+
+def thumbnail_path(filename, width):
+    return os.path.join(THUMBNAIL_FOLDER, str(width), thumbnail_name(filename))
+
+def save_atomic(img, target, image_format, **params):
+    """
+    Menyimpan gambar ke file sementara yang unik lalu me-rename ke `target`, sehingga
+    thread/worker lain tidak pernah membaca file setengah jadi. File sementara dihapus jika gagal.
+    """
+    tmp = tempfile.NamedTemporaryFile(dir=os.path.dirname(target), prefix='.', suffix='.tmp', delete=False)
+    tmp.close()
+    try:
+        img.save(tmp.name, image_format, **params)
+        os.replace(tmp.name, target)
+    finally:
+        if os.path.exists(tmp.name):
+            os.remove(tmp.name)
+
+def get_or_create_thumbnail(filename, width):
+    """
+    Mengembalikan path thumbnail WebP dengan lebar tertentu, membuatnya dari file
+    upload asli jika belum ada di cache disk. Mengembalikan None jika file asli tidak ada.
+    """
+    target = thumbnail_path(filename, width)
+    if os.path.exists(target):
+        return target
+
+    source = os.path.join(UPLOAD_FOLDER, filename)
+    if not os.path.isfile(source):
+        return None
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with Image.open(source) as img:
+        # Untuk JPEG, decode langsung pada skala kecil (jauh lebih cepat untuk foto kamera beresolusi tinggi)
+        img.draft('RGB', (width * 2, width * 2))
+        img = ImageOps.exif_transpose(img).convert('RGB')
+        if img.width > width:
+            height = max(1, round(img.height * width / img.width))
+            img = img.resize((width, height), Image.LANCZOS)
+        save_atomic(img, target, 'WEBP', quality=THUMBNAIL_QUALITY, method=4)
+    return target
+
+def delete_thumbnails(filename):
+    """Menghapus semua thumbnail milik sebuah file upload."""
+    for width in THUMBNAIL_WIDTHS:
+        target = thumbnail_path(filename, width)
+        if os.path.exists(target):
+            os.remove(target)
+
+COMPACTABLE_EXTENSIONS = ('.jpg', '.jpeg', '.png') # GIF bisa beranimasi, biarkan apa adanya
+
+def estimate_compaction(path, max_size):
+    """
+    Perkiraan byte yang dihemat jika gambar dikompres ke sisi terpanjang `max_size`
+    (sebanding dengan pengurangan jumlah piksel). 0 jika gambar tidak perlu dikompres.
+    Hanya membaca header gambar, tanpa decode.
+    """
+    if os.path.splitext(path)[1].lower() not in COMPACTABLE_EXTENSIONS:
+        return 0
+    with Image.open(path) as img:
+        longest = max(img.size)
+    if longest <= max_size:
+        return 0
+    return int(os.path.getsize(path) * (1 - (max_size / longest) ** 2))
+
+def compact_image(path, max_size, quality):
+    """
+    Mengecilkan gambar upload ke sisi terpanjang `max_size` dan mengompres ulang
+    dengan nama file yang sama, sehingga `Riwayat.image_path` tetap valid.
+    Mengembalikan jumlah byte yang dihemat (0 jika gambar tidak diubah).
+    """
+    if not estimate_compaction(path, max_size):
+        return 0
+
+    stat = os.stat(path)
+    tmp = tempfile.NamedTemporaryFile(dir=os.path.dirname(path), prefix='.', suffix='.tmp', delete=False)
+    tmp.close()
+    try:
+        with Image.open(path) as img:
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail((max_size, max_size), Image.LANCZOS)
+            if path.lower().endswith('.png'):
+                img.save(tmp.name, 'PNG', optimize=True)
+            else:
+                img.convert('RGB').save(tmp.name, 'JPEG', quality=quality, optimize=True)
+
+        if os.path.getsize(tmp.name) >= stat.st_size:
+            return 0
+
+        os.replace(tmp.name, path)
+        # Pertahankan waktu modifikasi asli agar umur file tetap dihitung dari waktu upload
+        os.utime(path, (stat.st_atime, stat.st_mtime))
+        return stat.st_size - os.path.getsize(path)
+    finally:
+        if os.path.exists(tmp.name):
+            os.remove(tmp.name)
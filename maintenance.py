@@ -0,0 +1,105 @@
+import os
+import time
+import logging
+import click
+from flask.cli import with_appcontext
+
+from models import db, Riwayat
+from images import compact_image, estimate_compaction, delete_thumbnails
+from config import UPLOAD_FOLDER, ORPHAN_MIN_AGE_HOURS, COMPACT_AFTER_DAYS, COMPACT_MAX_SIZE, COMPACT_JPEG_QUALITY
+
+SCAN_BATCH_SIZE = 500
+
+def iter_upload_batches(folder, batch_size):
+    """Membaca isi folder secara bertahap (os.scandir) agar memori tetap konstan."""
+    batch = []
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            batch.append(entry)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+def format_size(num_bytes):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if num_bytes < 1024 or unit == 'GB':
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+@click.command('cleanup-uploads')
+@click.option('--orphan-age', default=ORPHAN_MIN_AGE_HOURS, show_default=True, help='Umur minimum (jam) file tanpa riwayat sebelum dihapus.')
+@click.option('--compact-age', default=COMPACT_AFTER_DAYS, show_default=True, help='Umur minimum (hari) gambar asli sebelum dikompres ulang.')
+@click.option('--max-size', default=COMPACT_MAX_SIZE, show_default=True, help='Sisi terpanjang maksimum (piksel) setelah dikompres.')
+@click.option('--quality', default=COMPACT_JPEG_QUALITY, show_default=True, help='Kualitas JPEG setelah dikompres.')
+@click.option('--dry-run', is_flag=True, help='Hanya laporkan, jangan ubah file apa pun.')
+@with_appcontext
+def cleanup_uploads(orphan_age, compact_age, max_size, quality, dry_run):
+    """Menghapus upload tanpa riwayat dan mengompres ulang gambar asli yang sudah lama."""
+    now = time.time()
+    orphan_cutoff = now - orphan_age * 3600
+    compact_cutoff = now - compact_age * 86400
+
+    removed, removed_bytes = 0, 0
+    stale_tmp, stale_tmp_bytes = 0, 0
+    compacted, compacted_bytes = 0, 0
+    scanned = 0
+
+    for batch in iter_upload_batches(UPLOAD_FOLDER, SCAN_BATCH_SIZE):
+        scanned += len(batch)
+        db_paths = {}
+        for entry in batch:
+            if not entry.name.endswith('.tmp'):
+                db_paths[f"static/uploads/{entry.name}"] = entry
+                continue
+            # Sisa file sementara dari proses yang gagal/terhenti
+            try:
+                stat = entry.stat()
+                if stat.st_mtime < orphan_cutoff:
+                    if not dry_run:
+                        os.remove(entry.path)
+                    stale_tmp += 1
+                    stale_tmp_bytes += stat.st_size
+            except Exception as e:
+                logging.error(f"Error removing temp file {entry.name}: {e}")
+
+        referenced = {
+            image_path for (image_path,) in
+            db.session.query(Riwayat.image_path).filter(Riwayat.image_path.in_(list(db_paths)))
+        } if db_paths else set()
+
+        for db_path, entry in db_paths.items():
+            try:
+                stat = entry.stat()
+                if db_path not in referenced:
+                    # File tanpa Riwayat (mis. hasil "uncertain"); beri jeda agar upload yang sedang diproses aman
+                    if stat.st_mtime < orphan_cutoff:
+                        if not dry_run:
+                            os.remove(entry.path)
+                            delete_thumbnails(entry.name)
+                        removed += 1
+                        removed_bytes += stat.st_size
+                elif stat.st_mtime < compact_cutoff:
+                    # Dry run hanya memperkirakan penghematan dari jumlah piksel yang dikurangi
+                    saved = estimate_compaction(entry.path, max_size) if dry_run else compact_image(entry.path, max_size, quality)
+                    if saved:
+                        compacted += 1
+                        compacted_bytes += saved
+            except Exception as e:
+                logging.error(f"Error processing upload {entry.name}: {e}")
+
+        db.session.expire_all()
+
+    total_bytes = removed_bytes + stale_tmp_bytes + compacted_bytes
+    click.echo(f"Dipindai: {scanned} file")
+    click.echo(f"Dihapus (tanpa riwayat): {removed} file, {format_size(removed_bytes)}")
+    click.echo(f"Dihapus (file sementara): {stale_tmp} file, {format_size(stale_tmp_bytes)}")
+    if dry_run:
+        click.echo(f"Kandidat kompres ulang: {compacted} file, perkiraan {format_size(compacted_bytes)}")
+        click.echo(f"Perkiraan total ruang yang dihemat: {format_size(total_bytes)} (dry run)")
+    else:
+        click.echo(f"Dikompres ulang: {compacted} file, {format_size(compacted_bytes)}")
+        click.echo(f"Total ruang yang dihemat: {format_size(total_bytes)}")
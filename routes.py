@@ -1,7 +1,9 @@
+import csv
+import io
 import json
 import os
 from datetime import datetime, timedelta
-from flask import request, jsonify, render_template, Blueprint, current_app, flash, redirect, url_for
+from flask import request, jsonify, render_template, Blueprint, current_app, flash, redirect, url_for, Response, stream_with_context, abort, send_file
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy import or_
@@ -13,7 +15,9 @@ from flask_login import login_user, logout_user, login_required, current_user
 from models import db, User, Riwayat
 # Import fungsi baru is_image_a_leaf
 from services import get_models, preprocess_image, get_prediction_analysis, penanganan_data, is_image_a_leaf
-from config import UPLOAD_FOLDER, CLEAN_CLASS_NAMES, MONTH_MAP
+from caching import cached_page
+from images import get_or_create_thumbnail, delete_thumbnails
+from config import UPLOAD_FOLDER, CLEAN_CLASS_NAMES, MONTH_MAP, THUMBNAIL_WIDTHS, THUMBNAIL_MAX_AGE
 
 main_bp = Blueprint('main', __name__)
 
@@ -21,13 +25,24 @@ main_bp = Blueprint('main', __name__)
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+EXPORT_MODELS = ['MobileNetV2', 'EfficientNetV2M', 'ResNet101']
+EXPORT_BATCH_SIZE = 500
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+@main_bp.app_template_global()
+def thumbnail_url(image_path, width=THUMBNAIL_WIDTHS[1]):
+    return url_for('main.thumbnail', width=width, filename=os.path.basename(image_path))
+
+@main_bp.app_template_global()
+def thumbnail_srcset(image_path):
+    return ", ".join(f"{thumbnail_url(image_path, width)} {width}w" for width in THUMBNAIL_WIDTHS)
+
 @main_bp.route('/')
 def index():
-    return render_template('index.html')
+    # Navigasi di layout berbeda untuk pengguna yang sudah login, jadi cache dibedakan per status login
+    return cached_page(('index', current_user.is_authenticated), lambda: render_template('index.html'))
 
 # --- Rute Autentikasi ---
 @main_bp.route('/register', methods=['GET', 'POST'])
@@ -208,7 +223,7 @@ def predict():
             return jsonify({
                 "status": "uncertain",
                 "message": message,
-                "image_path": os.path.join('static/uploads', filename).replace("/")
+                "image_path": os.path.join('static/uploads', filename).replace("\\", "/")
             })
 
         # --- Dapatkan Label Kualitatif ---
@@ -257,7 +272,16 @@ def predict():
 
 @main_bp.route('/penanganan')
 def penanganan_index():
-    return render_template('penanganan.html', data=penanganan_data)
+    return cached_page(('penanganan', current_user.is_authenticated),
+                       lambda: render_template('penanganan.html', data=penanganan_data))
+
+@main_bp.route('/penanganan/<slug>')
+def penanganan_detail(slug):
+    for nama_penyakit, detail in penanganan_data.items():
+        if detail.get('slug') == slug:
+            return cached_page(('penanganan', slug),
+                               lambda: render_template('_penanganan_item.html', nama_penyakit=nama_penyakit, detail=detail))
+    abort(404)
 
 @main_bp.route('/riwayat')
 @login_required
@@ -312,6 +336,107 @@ def riwayat():
 
     return render_template('riwayat.html', histories=histories_from_db, query=query, sort_by=sort_by, sort_order=sort_order)
 
+def parse_export_date(value, end_of_day=False):
+    """Mengubah tanggal 'YYYY-MM-DD' (WIB) menjadi batas waktu UTC untuk filter ekspor."""
+    if not value:
+        return None
+    date_wib = datetime.strptime(value, '%Y-%m-%d')
+    if end_of_day:
+        date_wib += timedelta(days=1)
+    return date_wib - timedelta(hours=7)
+
+def iter_export_rows(user_id, start, end):
+    """Mengambil riwayat per batch (yield_per) agar memori tetap konstan berapa pun jumlah barisnya."""
+    histories_query = Riwayat.query.filter_by(user_id=user_id)
+    if start:
+        histories_query = histories_query.filter(Riwayat.timestamp >= start)
+    if end:
+        histories_query = histories_query.filter(Riwayat.timestamp < end)
+    histories_query = histories_query.order_by(Riwayat.timestamp.asc()) \
+        .execution_options(stream_results=True) \
+        .yield_per(EXPORT_BATCH_SIZE)
+
+    for history in histories_query:
+        details = json.loads(history.detailed_results) if history.detailed_results else {}
+        wib_timestamp = history.timestamp + timedelta(hours=7)
+        yield {
+            "id": history.id,
+            "timestamp": wib_timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+            "filename": history.filename,
+            "prediction": history.prediction,
+            "indonesian_name": penanganan_data.get(history.prediction, {}).get('indonesian_name', ''),
+            "confidence": history.confidence,
+            "image_path": history.image_path,
+            "detailed_results": {model_name: details.get(model_name, []) for model_name in EXPORT_MODELS}
+        }
+
+def generate_export_csv(rows):
+    header = ['id', 'timestamp', 'filename', 'prediction', 'indonesian_name', 'confidence', 'image_path']
+    header += [f"{model_name} - {class_name}" for model_name in EXPORT_MODELS for class_name in CLEAN_CLASS_NAMES]
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    yield buffer.getvalue()
+
+    for row in rows:
+        buffer.seek(0)
+        buffer.truncate(0)
+        probabilities = []
+        for model_name in EXPORT_MODELS:
+            scores = row["detailed_results"][model_name]
+            probabilities += [scores[i] if i < len(scores) else '' for i in range(len(CLEAN_CLASS_NAMES))]
+        writer.writerow([row["id"], row["timestamp"], row["filename"], row["prediction"],
+                         row["indonesian_name"], row["confidence"], row["image_path"]] + probabilities)
+        yield buffer.getvalue()
+
+def generate_export_ndjson(rows):
+    for row in rows:
+        row["detailed_results"] = {
+            model_name: dict(zip(CLEAN_CLASS_NAMES, scores))
+            for model_name, scores in row["detailed_results"].items()
+        }
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+@main_bp.route('/riwayat/export')
+@login_required
+def export_riwayat():
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({'error': 'Format ekspor tidak valid. Gunakan csv atau ndjson.'}), 400
+
+    try:
+        start = parse_export_date(request.args.get('start_date'))
+        end = parse_export_date(request.args.get('end_date'), end_of_day=True)
+    except ValueError:
+        return jsonify({'error': 'Format tanggal tidak valid. Gunakan YYYY-MM-DD.'}), 400
+
+    # Simpan id pengguna sebelum streaming; generator berjalan setelah fungsi view selesai
+    rows = iter_export_rows(current_user.id, start, end)
+    if export_format == 'csv':
+        body, mimetype = generate_export_csv(rows), 'text/csv'
+    else:
+        body, mimetype = generate_export_ndjson(rows), 'application/x-ndjson'
+
+    filename = f"riwayat_{datetime.now().strftime('%Y%m%d%H%M%S')}.{export_format}"
+    return Response(stream_with_context(body), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+@main_bp.route('/thumbnails/<int:width>/<filename>')
+def thumbnail(width, filename):
+    if width not in THUMBNAIL_WIDTHS or filename != secure_filename(filename):
+        abort(404)
+
+    try:
+        path = get_or_create_thumbnail(filename, width)
+    except Exception as e:
+        logging.error(f"Error creating thumbnail for {filename}: {e}")
+        path = None
+    if not path:
+        abort(404)
+
+    return send_file(path, mimetype='image/webp', max_age=THUMBNAIL_MAX_AGE, conditional=True)
+
 @main_bp.route('/riwayat/<int:riwayat_id>')
 @login_required
 def riwayat_detail(riwayat_id):
@@ -362,6 +487,7 @@ def delete_riwayat(riwayat_id):
             image_file_path = os.path.join(current_app.root_path, history.image_path)
             if os.path.exists(image_file_path):
                 os.remove(image_file_path)
+            delete_thumbnails(os.path.basename(history.image_path))
                 
         db.session.delete(history)
         db.session.commit()